@@ -0,0 +1,344 @@
+"""
+Response caching for stage models.
+Wraps a LangChain chat model so repeated (or, in semantic mode, near-identical)
+prompts are answered from an on-disk cache instead of calling the provider again.
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+from config.settings import OUTPUT_DIR
+
+logger = logging.getLogger(__name__)
+
+# "off": no caching, "exact": same prompt text, "semantic": embedding similarity
+CACHE_MODES = ("off", "exact", "semantic")
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.97
+
+# Temperature added per repeated sample of the same prompt (capped at 1.0)
+RESAMPLE_TEMPERATURE_STEP = 0.2
+
+_embedder = None
+# numpy, imported together with the embedder
+np = None
+
+
+def _semantic_available():
+    """True if sentence-transformers and numpy are installed (without importing them)."""
+    return all(importlib.util.find_spec(name) is not None for name in ("sentence_transformers", "numpy"))
+
+
+def _get_embedder():
+    """
+    Load the local sentence embedding model on first use.
+    sentence-transformers pulls in torch, so it is only imported once a
+    "semantic" cache actually needs an embedding.
+    """
+    global _embedder, np
+    if _embedder is None:
+        import numpy
+        from sentence_transformers import SentenceTransformer
+        np = numpy
+        _embedder = SentenceTransformer(EMBEDDING_MODEL)
+    return _embedder
+
+
+def _fits_embedder(embedder, text):
+    """
+    True if the whole text fits in the embedding model's input window.
+    Longer text is truncated before embedding, so texts that only differ
+    past the cut would all look identical to a semantic lookup.
+    """
+    return len(embedder.tokenizer(text, truncation=False)["input_ids"]) <= embedder.max_seq_length
+
+
+def _prompt_text(messages):
+    """Flatten the invoke() input (string or list of messages) into one prompt string."""
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(getattr(message, "content", message)) for message in messages)
+
+
+def _prompt_key(prompt):
+    """Content-addressed key for a prompt."""
+    return hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CachingChatModel:
+    """
+    Caching proxy around a chat model, persisted to output/.cache/<namespace>.sqlite.
+    
+    Each (prompt, call_index) pair is cached separately: the n-th time a prompt is
+    sent within one process run it is answered with the n-th stored response. Reruns
+    replay the same sequence of samples instead of collapsing them into one, so
+    stages that sample the same prompt several times keep their independent outputs.
+    
+    In semantic mode, callers pass invoke(..., semantic_key=...): a short text naming
+    the prompt's inputs (e.g. company and questions). Full stage prompts carry the
+    multi-KB company profile and would be truncated by the embedding model.
+    
+    Only invoke() and ainvoke() are intercepted; every other attribute
+    is forwarded to the wrapped model.
+    """
+    
+    # (namespace, prompt_key) -> number of calls made with that prompt in this run
+    _call_counts = {}
+    # sqlite path -> shared connection
+    _connections = {}
+    _lock = threading.Lock()
+    
+    def __init__(self, model, namespace, cache_mode="exact", model_id="", temperature=0,
+                 resample=None, threshold=SIMILARITY_THRESHOLD, ttl=None):
+        """
+        Args:
+            model: The LangChain model to wrap
+            namespace: Cache namespace, usually the STAGE_MODELS key
+            cache_mode: "off", "exact" or "semantic"
+            model_id: "provider:model_name", part of the cache key
+            temperature: Temperature the wrapped model was built with
+            resample: Optional callable(temperature) -> model, used to draw
+                      repeated samples of the same prompt at a higher temperature
+            threshold: Minimum cosine similarity for a semantic cache hit
+            ttl: Seconds a cached response stays valid (None = forever)
+        """
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{cache_mode}', expected one of {CACHE_MODES}")
+        
+        if cache_mode == "semantic" and not _semantic_available():
+            logger.warning("sentence-transformers not installed, falling back to exact prompt caching")
+            cache_mode = "exact"
+        
+        self.model = model
+        self.namespace = namespace
+        self.cache_mode = cache_mode
+        self.model_id = model_id
+        self.temperature = temperature
+        self.resample = resample
+        self.threshold = threshold
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._warned_long_prompt = False
+        # temperature -> model built by resample
+        self._samplers = {}
+    
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+    
+    def _connection(self):
+        """Open (once) the sqlite file backing this namespace."""
+        safe_name = re.sub(r"[^\w.-]", "_", self.namespace)
+        path = os.path.join(OUTPUT_DIR, ".cache", f"{safe_name}.sqlite")
+        
+        with self._lock:
+            conn = self._connections.get(path)
+            if conn is None:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                conn = sqlite3.connect(path, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    " prompt_key TEXT NOT NULL,"
+                    " call_index INTEGER NOT NULL,"
+                    " model_id TEXT NOT NULL,"
+                    " content TEXT NOT NULL,"
+                    " embedding BLOB,"
+                    " created_at REAL NOT NULL DEFAULT 0,"
+                    " PRIMARY KEY (prompt_key, call_index))"
+                )
+                # Caches written before TTL support lack created_at; their rows count as expired
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(responses)")}
+                if "created_at" not in columns:
+                    conn.execute("ALTER TABLE responses ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+                conn.commit()
+                self._connections[path] = conn
+            return conn
+    
+    def _next_call_index(self, key):
+        with self._lock:
+            index = self._call_counts.get((self.namespace, key), 0)
+            self._call_counts[(self.namespace, key)] = index + 1
+            return index
+    
+    def _release_call_index(self, key, index):
+        """Give back an index whose call failed so a retry reuses it."""
+        with self._lock:
+            if self._call_counts.get((self.namespace, key)) == index + 1:
+                self._call_counts[(self.namespace, key)] = index
+    
+    def _cutoff(self):
+        """Oldest created_at still considered fresh."""
+        return time.time() - self.ttl if self.ttl else 0
+    
+    def _lookup(self, key, index):
+        conn = self._connection()
+        with self._lock:
+            row = conn.execute(
+                "SELECT content FROM responses"
+                " WHERE prompt_key = ? AND call_index = ? AND created_at >= ?",
+                (key, index, self._cutoff()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def _nearest(self, embedding, index):
+        """Return cached content for the most similar prompt above the threshold."""
+        conn = self._connection()
+        with self._lock:
+            rows = conn.execute(
+                "SELECT embedding, content FROM responses"
+                " WHERE model_id = ? AND call_index = ? AND embedding IS NOT NULL AND created_at >= ?",
+                (self.model_id, index, self._cutoff()),
+            ).fetchall()
+        
+        best_score, best_content = 0.0, None
+        for blob, content in rows:
+            score = float(np.dot(np.frombuffer(blob, dtype=np.float32), embedding))
+            if score > best_score:
+                best_score, best_content = score, content
+        return json.loads(best_content) if best_score >= self.threshold else None
+    
+    def _store(self, key, index, content, embedding):
+        conn = self._connection()
+        blob = embedding.astype(np.float32).tobytes() if embedding is not None else None
+        with self._lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (prompt_key, call_index, model_id, content, embedding, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, index, self.model_id, json.dumps(content), blob, time.time()),
+            )
+            conn.commit()
+    
+    def _sampling_model(self, index):
+        """Model used for the n-th sample of a prompt: later samples get a temperature bump."""
+        if index == 0 or self.resample is None:
+            return self.model
+        temperature = min(1.0, self.temperature + RESAMPLE_TEMPERATURE_STEP * index)
+        # Built once per wrapper, like the wrapped model itself
+        model = self._samplers.get(temperature)
+        if model is None:
+            model = self._samplers[temperature] = self.resample(temperature)
+        return model
+    
+    def _embed(self, prompt, semantic_key):
+        """
+        Embedding used for semantic lookups: of semantic_key if the caller gave one
+        (a short text identifying the prompt's inputs), else of the prompt itself.
+        None if that text doesn't fit the embedding model's input window.
+        """
+        text = prompt if semantic_key is None else semantic_key
+        embedder = _get_embedder()
+        if _fits_embedder(embedder, text):
+            return embedder.encode(text, normalize_embeddings=True)
+        if not self._warned_long_prompt:
+            self._warned_long_prompt = True
+            logger.warning(
+                "%s: text to embed is longer than the %s input window; matching exactly instead of semantically",
+                self.namespace, EMBEDDING_MODEL,
+            )
+        return None
+    
+    def _cached(self, messages, semantic_key=None):
+        """
+        Reserve the next call index for this prompt and look it up.
+        Returns (key, index, embedding, cached_content or None).
+        """
+        prompt = _prompt_text(messages)
+        key = _prompt_key(f"{self.model_id}|{prompt}")
+        index = self._next_call_index(key)
+        
+        content = self._lookup(key, index)
+        embedding = None
+        if content is None and self.cache_mode == "semantic":
+            embedding = self._embed(prompt, semantic_key)
+            if embedding is not None:
+                content = self._nearest(embedding, index)
+        
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return key, index, embedding, content
+    
+    def invoke(self, messages, *args, semantic_key=None, **kwargs):
+        if self.cache_mode == "off":
+            return self.model.invoke(messages, *args, **kwargs)
+        
+        key, index, embedding, content = self._cached(messages, semantic_key)
+        if content is not None:
+            return AIMessage(content=content)
+        
+        try:
+            response = self._sampling_model(index).invoke(messages, *args, **kwargs)
+        except BaseException:
+            # Also covers cancellation (e.g. a losing hedged request)
+            self._release_call_index(key, index)
+            raise
+        
+        self._store(key, index, response.content, embedding)
+        return response
+    
+    async def ainvoke(self, messages, *args, semantic_key=None, **kwargs):
+        if self.cache_mode == "off":
+            return await self.model.ainvoke(messages, *args, **kwargs)
+        
+        key, index, embedding, content = self._cached(messages, semantic_key)
+        if content is not None:
+            return AIMessage(content=content)
+        
+        try:
+            response = await self._sampling_model(index).ainvoke(messages, *args, **kwargs)
+        except BaseException:
+            # Also covers cancellation (e.g. a losing hedged request)
+            self._release_call_index(key, index)
+            raise
+        
+        self._store(key, index, response.content, embedding)
+        return response
+    
+    def remember(self, messages, content, semantic_key=None):
+        """
+        Store content as the next response for messages without calling the model,
+        e.g. an answer another provider gave for this stage, so reruns replay it.
+        """
+        if self.cache_mode == "off":
+            return
+        
+        prompt = _prompt_text(messages)
+        key = _prompt_key(f"{self.model_id}|{prompt}")
+        embedding = self._embed(prompt, semantic_key) if self.cache_mode == "semantic" else None
+        self._store(key, self._next_call_index(key), content, embedding)
+    
+    def discard(self, messages):
+        """
+        Forget the latest response for messages, e.g. one the stage rejected after
+        parsing it: the row is deleted and its call index given back, so it is
+        neither replayed on later runs nor counted against a retry in this one.
+        """
+        if self.cache_mode == "off":
+            return
+        
+        key = _prompt_key(f"{self.model_id}|{_prompt_text(messages)}")
+        conn = self._connection()
+        with self._lock:
+            index = self._call_counts.get((self.namespace, key), 0) - 1
+            if index < 0:
+                return
+            conn.execute("DELETE FROM responses WHERE prompt_key = ? AND call_index = ?", (key, index))
+            conn.commit()
+            self._call_counts[(self.namespace, key)] = index
+    
+    def stats(self):
+        """Cache hits and misses for this wrapper since the process started."""
+        return {"hits": self.hits, "misses": self.misses}
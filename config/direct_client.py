@@ -0,0 +1,143 @@
+"""
+Direct HTTP chat client for providers with an OpenAI-compatible API.
+Skips the langchain/provider-SDK layers for simple prompt-in, text-out calls.
+Enable per provider with DIRECT_HTTP_PROVIDERS in config/settings.py.
+"""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+
+from langchain_core.messages import AIMessage
+
+from config import settings
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Provider -> OpenAI-compatible chat completions endpoint
+PROVIDER_ENDPOINTS = {
+    "gemini": "https://generativelanguage.googleapis.com/v1beta/openai/chat/completions",
+    "openai": "https://api.openai.com/v1/chat/completions",
+    "cohere": "https://api.cohere.ai/compatibility/v1/chat/completions",
+    "mistral": "https://api.mistral.ai/v1/chat/completions",
+    "groq": "https://api.groq.com/openai/v1/chat/completions",
+}
+
+# Provider -> API key setting name
+PROVIDER_API_KEYS = {
+    "gemini": "GOOGLE_API_KEY",
+    "openai": "OPENAI_API_KEY",
+    "cohere": "COHERE_API_KEY",
+    "mistral": "MISTRAL_API_KEY",
+    "groq": "GROQ_API_KEY",
+}
+
+REQUEST_TIMEOUT = 300
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_ROLES = {"human": "user", "ai": "assistant", "system": "system"}
+
+_sync_client = None
+_sync_client_lock = threading.Lock()
+# One AsyncClient per event loop; a client's connection pool can't outlive its loop,
+# so close_async_client() closes it before the loop ends
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _limits():
+    return httpx.Limits(max_keepalive_connections=20, max_connections=100)
+
+
+def _get_sync_client():
+    global _sync_client
+    if _sync_client is None:
+        # Worker threads may ask at the same time; only one of them builds the client
+        with _sync_client_lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(http2=_HTTP2, limits=_limits(), timeout=REQUEST_TIMEOUT)
+    return _sync_client
+
+
+def _get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(http2=_HTTP2, limits=_limits(), timeout=REQUEST_TIMEOUT)
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """
+    Close the running event loop's client, if it made one.
+    Call before the loop finishes (CompanyAuditPipeline does this at the end of
+    every asyncio run) so its connections are shut down cleanly.
+    """
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _to_openai_messages(messages):
+    """Convert invoke() input (string or LangChain messages) to OpenAI chat messages."""
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    return [
+        {"role": _ROLES.get(getattr(message, "type", "human"), "user"), "content": message.content}
+        for message in messages
+    ]
+
+
+def _request_args(provider, model, messages, temperature):
+    api_key = getattr(settings, PROVIDER_API_KEYS[provider])
+    headers = {"Authorization": f"Bearer {api_key}"}
+    payload = {
+        "model": model,
+        "messages": _to_openai_messages(messages),
+        "temperature": temperature,
+    }
+    return PROVIDER_ENDPOINTS[provider], headers, payload
+
+
+def _response_text(response):
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+async def chat(provider, model, messages, temperature=0):
+    """Send one chat completion request and return the response text."""
+    url, headers, payload = _request_args(provider, model, messages, temperature)
+    response = await _get_async_client().post(url, headers=headers, json=payload)
+    return _response_text(response)
+
+
+class DirectChat:
+    """
+    Minimal chat model exposing the invoke()/ainvoke() interface used by the pipeline.
+    Responses are returned as AIMessage so callers can keep reading `.content`.
+    """
+
+    def __init__(self, provider, model, temperature=0):
+        if httpx is None:
+            raise ImportError("Direct HTTP mode requires httpx - run: pip install httpx")
+        if provider not in PROVIDER_ENDPOINTS:
+            raise ValueError(f"Provider '{provider}' has no direct HTTP endpoint")
+        
+        self.provider = provider
+        self.model = model
+        self.temperature = temperature
+
+    def invoke(self, messages, *args, **kwargs):
+        url, headers, payload = _request_args(self.provider, self.model, messages, self.temperature)
+        response = _get_sync_client().post(url, headers=headers, json=payload)
+        return AIMessage(content=_response_text(response))
+    
+    async def ainvoke(self, messages, *args, **kwargs):
+        text = await chat(self.provider, self.model, messages, self.temperature)
+        return AIMessage(content=text)
@@ -3,41 +3,111 @@ Model initialization for all AI providers.
 Supports: Google Gemini, OpenAI, Cohere, Mistral, and Groq.
 """
 
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError:
-    ChatGoogleGenerativeAI = None
+import importlib
+import logging
+import threading
+from collections.abc import Mapping
 
-try:
-    from langchain_openai import ChatOpenAI
-except ImportError:
-    ChatOpenAI = None
+from config.cache import CachingChatModel
+from config.direct_client import DirectChat
+from config.settings import (
+    DIRECT_HTTP_PROVIDERS,
+    PROVIDER_TABLE,
+    STAGE_CACHE_MODES,
+    STAGE_CACHE_TTLS,
+    STAGE_SPECS,
+    ModelSpec,
+    parse_model_spec,
+)
 
-try:
-    from langchain_cohere import ChatCohere
-except ImportError:
-    ChatCohere = None
+logger = logging.getLogger(__name__)
 
-try:
-    from langchain_mistralai import ChatMistralAI
-except ImportError:
-    ChatMistralAI = None
+# Provider SDKs are imported on first use (see __getattr__ below) so that
+# importing this module does not pull in every langchain_* package.
+_PROVIDER_IMPORTS = {
+    "ChatGoogleGenerativeAI": ("langchain_google_genai", "ChatGoogleGenerativeAI"),
+    "ChatOpenAI": ("langchain_openai", "ChatOpenAI"),
+    "ChatCohere": ("langchain_cohere", "ChatCohere"),
+    "ChatMistralAI": ("langchain_mistralai", "ChatMistralAI"),
+    "ChatGroq": ("langchain_groq", "ChatGroq"),
+}
 
-try:
-    from langchain_groq import ChatGroq
-except ImportError:
-    ChatGroq = None
 
-from config.settings import MODELS_CONFIG
+def __getattr__(name):
+    """
+    Import a provider chat class the first time it is looked up.
+    The result (or None if the SDK is not installed) is cached in the module globals.
+    Other import errors (e.g. a broken dependency) return None without caching,
+    so the next lookup tries again.
+    """
+    if name not in _PROVIDER_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module_name, attr = _PROVIDER_IMPORTS[name]
+    try:
+        value = getattr(importlib.import_module(module_name), attr)
+    except ModuleNotFoundError as e:
+        if e.name != module_name:
+            logger.warning("Could not import %s: %s", module_name, e)
+            return None
+        value = None
+    except ImportError as e:
+        logger.warning("Could not import %s: %s", module_name, e)
+        return None
+    globals()[name] = value
+    return value
+
+
+def _provider_class(name):
+    """Return the provider chat class by name, importing it lazily."""
+    if name in globals():
+        return globals()[name]
+    return __getattr__(name)
+
+
+# Provider key (as used in MODELS_CONFIG / STAGE_MODELS) -> chat class name
+_PROVIDER_DISPATCH = {
+    "gemini": "ChatGoogleGenerativeAI",
+    "openai": "ChatOpenAI",
+    "cohere": "ChatCohere",
+    "mistral": "ChatMistralAI",
+    "groq": "ChatGroq",
+}
+
+
+class ConfigurationError(Exception):
+    """Raised when MODELS_CONFIG / STAGE_MODELS cannot provide a usable model."""
+
+
+def install_hint(provider):
+    """Return the pip package that provides a provider's chat class, e.g. "langchain-groq"."""
+    module_name, _ = _PROVIDER_IMPORTS[_PROVIDER_DISPATCH[provider]]
+    return module_name.replace("_", "-")
+
+
+def _build(provider, model_name, temperature):
+    """
+    Create a chat model instance with its own client. Failures raise.
+    Instances are not shared: async clients hold connections tied to the event
+    loop they first ran on, so each caller keeps its own for as long as it uses
+    one loop (see CompanyAuditPipeline._stage_model).
+    """
+    if provider in DIRECT_HTTP_PROVIDERS:
+        return DirectChat(provider, model_name, temperature)
+    model_class = _provider_class(_PROVIDER_DISPATCH[provider])
+    return model_class(model=model_name, temperature=temperature)
 
 
-def get_model_by_spec(model_spec):
+def get_model_by_spec(model_spec, cache_mode="off", namespace=None, cache_ttl=None):
     """
-    Get or create a model based on specification.
+    Create a model based on specification.
     
     Args:
         model_spec: "provider" or "provider:model_name"
                    e.g., "gemini" or "groq:llama-3.3-70b-versatile"
+        cache_mode: "off", "exact" or "semantic" (see config/cache.py)
+        namespace: Cache namespace, e.g. the STAGE_MODELS key (defaults to the spec)
+        cache_ttl: Seconds a cached response stays valid (None = forever)
     
     Returns:
         Model instance or None if failed
@@ -45,118 +115,156 @@ def get_model_by_spec(model_spec):
     if not model_spec:
         return None
     
-    # Parse model spec
-    if ":" in model_spec:
-        provider, model_name = model_spec.split(":", 1)
-    else:
-        provider = model_spec
-        model_name = None
+    return get_model_for_stage(
+        parse_model_spec(model_spec), cache_mode=cache_mode, namespace=namespace, cache_ttl=cache_ttl
+    )
+
+
+def get_model_for_stage(spec, cache_mode="off", namespace=None, cache_ttl=None):
+    """
+    Create a model from an already parsed ModelSpec (see STAGE_SPECS in settings).
+    Every call builds a new instance with its own client and cache statistics (see _build).
+    
+    Args:
+        spec: ModelSpec(provider, model_name or None, temperature)
+        cache_mode: "off", "exact" or "semantic" (see config/cache.py)
+        namespace: Cache namespace, e.g. the STAGE_MODELS key (defaults to the spec)
+        cache_ttl: Seconds a cached response stays valid (None = forever)
+    
+    Returns:
+        Model instance or None if failed
+    """
+    try:
+        return _create_model(spec, cache_mode, namespace, cache_ttl)
+    except ConfigurationError as e:
+        logger.warning("%s", e)
+        return None
+
+
+def _create_model(spec, cache_mode, namespace, cache_ttl):
+    """Build the model for a ModelSpec. Raises ConfigurationError."""
+    provider, model_name, temp = spec.provider, spec.model_name, spec.temperature
+    entry = PROVIDER_TABLE.get(provider)
     
     # If no specific model name provided, use default from config
     if not model_name:
-        if provider not in MODELS_CONFIG:
-            print(f"!! Provider '{provider}' not found in MODELS_CONFIG")
-            return None
-        if not MODELS_CONFIG[provider].get("enabled"):
-            print(f"!! Provider '{provider}' is not enabled")
-            return None
-        model_name = MODELS_CONFIG[provider]["model_name"]
+        if entry is None:
+            raise ConfigurationError(f"Provider {provider!r} not found in MODELS_CONFIG")
+        default_name, _, enabled = entry
+        if not enabled:
+            raise ConfigurationError(f"Provider {provider!r} is not enabled")
+        model_name = default_name
+    
+    class_name = _PROVIDER_DISPATCH.get(provider)
+    if class_name is None:
+        raise ConfigurationError(
+            f"Provider {provider!r} not available, expected one of: {', '.join(_PROVIDER_DISPATCH)}"
+        )
+    
+    if provider not in DIRECT_HTTP_PROVIDERS and _provider_class(class_name) is None:
+        raise ConfigurationError(
+            f"Provider {provider!r} is not installed - run: pip install {install_hint(provider)}"
+        )
     
     # Create model based on provider
     try:
-        if provider == "gemini" and ChatGoogleGenerativeAI:
-            temp = MODELS_CONFIG.get(provider, {}).get("temperature", 0)
-            return ChatGoogleGenerativeAI(model=model_name, temperature=temp)
-        
-        elif provider == "openai" and ChatOpenAI:
-            temp = MODELS_CONFIG.get(provider, {}).get("temperature", 0)
-            return ChatOpenAI(model=model_name, temperature=temp)
-        
-        elif provider == "cohere" and ChatCohere:
-            temp = MODELS_CONFIG.get(provider, {}).get("temperature", 0)
-            return ChatCohere(model=model_name, temperature=temp)
-        
-        elif provider == "mistral" and ChatMistralAI:
-            temp = MODELS_CONFIG.get(provider, {}).get("temperature", 0)
-            return ChatMistralAI(model=model_name, temperature=temp)
-        
-        elif provider == "groq" and ChatGroq:
-            temp = MODELS_CONFIG.get(provider, {}).get("temperature", 0)
-            return ChatGroq(model=model_name, temperature=temp)
-        
-        else:
-            print(f"!! Provider '{provider}' not available or not installed")
-            return None
-    
+        model = _build(provider, model_name, temp)
     except Exception as e:
-        print(f"!! Failed to initialize {provider}:{model_name} - {e}")
-        return None
+        raise ConfigurationError(f"Failed to initialize {provider}:{model_name} - {e}") from e
+    
+    if cache_mode == "off":
+        return model
+    model_id = f"{provider}:{model_name}"
+    return CachingChatModel(
+        model,
+        namespace=namespace or model_id,
+        cache_mode=cache_mode,
+        model_id=model_id,
+        temperature=temp,
+        resample=lambda temperature: _build(provider, model_name, temperature),
+        ttl=cache_ttl,
+    )
 
 
-def get_models():
+def get_stage_model(stage):
     """
-    Initialize and return ALL available models based on configuration.
-    Only initializes models that are enabled.
-    Returns a dict with model_name as key and model instance as value.
+    Create the model configured for a pipeline stage (a STAGE_MODELS key), or None if it can't be built.
+    Like get_model_for_stage, every call builds a new instance.
+    """
+    return get_model_for_stage(
+        STAGE_SPECS[stage],
+        cache_mode=STAGE_CACHE_MODES.get(stage, "off"),
+        namespace=stage,
+        cache_ttl=STAGE_CACHE_TTLS.get(stage),
+    )
+
+
+def _enabled_providers():
+    """Provider keys that are enabled in MODELS_CONFIG, in dispatch order."""
+    return [
+        provider for provider in _PROVIDER_DISPATCH
+        if provider in PROVIDER_TABLE and PROVIDER_TABLE[provider][2]
+    ]
+
+
+class LazyModels(Mapping):
+    """
+    Read-only mapping of enabled provider -> default model instance.
+    A provider's model is only built when it is looked up, and each lookup builds
+    a new instance (see _build); iterating or counting the mapping does not construct anything.
     """
-    models = {}
-    
-    # Google Gemini
-    if MODELS_CONFIG.get("gemini", {}).get("enabled") and ChatGoogleGenerativeAI:
-        try:
-            models["gemini"] = ChatGoogleGenerativeAI(
-                model=MODELS_CONFIG["gemini"]["model_name"],
-                temperature=MODELS_CONFIG["gemini"]["temperature"],
-            )
-            # print(f"[ Gemini initialized: {MODELS_CONFIG['gemini']['model_name']} ]")
-        except Exception as e:
-            print(f"!! Gemini initialization failed: {e}")
-    
-    # OpenAI
-    if MODELS_CONFIG.get("openai", {}).get("enabled") and ChatOpenAI:
-        try:
-            models["openai"] = ChatOpenAI(
-                model=MODELS_CONFIG["openai"]["model_name"],
-                temperature=MODELS_CONFIG["openai"]["temperature"],
-            )
-            # print(f"[ OpenAI initialized: {MODELS_CONFIG['openai']['model_name']} ]")
-        except Exception as e:
-            print(f"!! OpenAI initialization failed: {e}")
-    
-    # Cohere
-    if MODELS_CONFIG.get("cohere", {}).get("enabled") and ChatCohere:
-        try:
-            models["cohere"] = ChatCohere(
-                model=MODELS_CONFIG["cohere"]["model_name"],
-                temperature=MODELS_CONFIG["cohere"]["temperature"],
-            )
-            # print(f"[ Cohere initialized: {MODELS_CONFIG['cohere']['model_name']} ]")
-        except Exception as e:
-            print(f"!! Cohere initialization failed: {e}")
     
-    # Mistral
-    if MODELS_CONFIG.get("mistral", {}).get("enabled") and ChatMistralAI:
-        try:
-            models["mistral"] = ChatMistralAI(
-                model=MODELS_CONFIG["mistral"]["model_name"],
-                temperature=MODELS_CONFIG["mistral"]["temperature"],
+    def __getitem__(self, provider):
+        if not _enabled_providers():
+            raise ConfigurationError(
+                "No models enabled; set at least one MODELS_CONFIG[*]['enabled'] = True in config/settings.py"
             )
-            # print(f"[ Mistral initialized: {MODELS_CONFIG['mistral']['model_name']} ]")
-        except Exception as e:
-            print(f"!! Mistral initialization failed: {e}")
+        if provider not in self:
+            raise KeyError(provider)
+        model = get_model_for_stage(ModelSpec(provider, None, PROVIDER_TABLE[provider][1]))
+        if model is None:
+            raise KeyError(provider)
+        return model
     
-    # Groq
-    if MODELS_CONFIG.get("groq", {}).get("enabled") and ChatGroq:
-        try:
-            models["groq"] = ChatGroq(
-                model=MODELS_CONFIG["groq"]["model_name"],
-                temperature=MODELS_CONFIG["groq"]["temperature"],
-            )
-            # print(f"[ Groq initialized: {MODELS_CONFIG['groq']['model_name']} ]")
-        except Exception as e:
-            print(f"!! Groq initialization failed: {e}")
+    def __contains__(self, provider):
+        return provider in _enabled_providers()
     
-    if not models:
-        raise Exception("No models could be initialized. Please enable at least one model and check your API keys.")
+    def __iter__(self):
+        return iter(_enabled_providers())
     
-    return models
+    def __len__(self):
+        return len(_enabled_providers())
+
+
+def get_models():
+    """
+    Return ALL enabled models based on configuration as a lazy mapping.
+    Each model is initialized when it is looked up;
+    configuration problems surface as ConfigurationError at that point.
+    Keys are provider names, values are model instances.
+    """
+    return LazyModels()
+
+
+def _warm_provider_imports(providers):
+    """Import the SDKs for the given providers so the first stage call doesn't pay for it."""
+    for provider in providers:
+        class_name = _PROVIDER_DISPATCH.get(provider)
+        if class_name:
+            _provider_class(class_name)
+
+
+def start_provider_import_warmup():
+    """
+    Import the SDKs for the providers used in STAGE_MODELS on a background thread,
+    overlapping them with the rest of startup. Called by entry points; importing
+    this module has no side effects.
+    """
+    thread = threading.Thread(
+        target=_warm_provider_imports,
+        args=({spec.provider for spec in STAGE_SPECS.values()} - set(DIRECT_HTTP_PROVIDERS),),
+        name="provider-import-warmup",
+        daemon=True,
+    )
+    thread.start()
+    return thread
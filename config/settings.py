@@ -1,14 +1,31 @@
 import os
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional
 from dotenv import load_dotenv
 
-load_dotenv()
+# Read .env once per process; reload() re-runs this module in the same globals, so the flag survives it
+if not globals().get("_DOTENV_LOADED"):
+    load_dotenv()
+    _DOTENV_LOADED = True
 
-# API Keys
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-COHERE_API_KEY = os.getenv("COHERE_API_KEY", "")
-MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY", "")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+# API Keys - resolved from the environment on first access (see __getattr__)
+API_KEY_NAMES = (
+    "GOOGLE_API_KEY",
+    "OPENAI_API_KEY",
+    "COHERE_API_KEY",
+    "MISTRAL_API_KEY",
+    "GROQ_API_KEY",
+)
+
+
+def __getattr__(name):
+    if name in API_KEY_NAMES:
+        value = os.getenv(name, "")
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================
 # MODEL CONFIGURATIONS
@@ -47,6 +64,23 @@ MODELS_CONFIG = {
     },
 }
 
+# Max concurrent requests per provider for batched calls.
+# Override per provider with MODELS_CONFIG[provider]["max_concurrency"].
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+def provider_max_concurrency(provider):
+    """Concurrent request limit for a provider."""
+    return MODELS_CONFIG.get(provider, {}).get("max_concurrency", DEFAULT_MAX_CONCURRENCY)
+
+
+# Precomputed (model_name, temperature, enabled) per provider for fast lookups.
+# Derived from MODELS_CONFIG - edit MODELS_CONFIG above, not this table.
+PROVIDER_TABLE = {
+    provider: (cfg["model_name"], cfg.get("temperature", 0), cfg.get("enabled", False))
+    for provider, cfg in MODELS_CONFIG.items()
+}
+
 # ============================================
 # PIPELINE STAGE CONFIGURATION
 # CUSTOMIZE THIS TO CHANGE WHICH MODEL RUNS EACH STAGE
@@ -65,9 +99,86 @@ STAGE_MODELS = {
     "stage_4_score_results": "cohere",                             # Uses: command-a-03-2025
 }
 
+# Providers to call through the lightweight direct HTTP client (config/direct_client.py)
+# instead of their langchain SDK. Uses the provider's OpenAI-compatible endpoint.
+# Example: DIRECT_HTTP_PROVIDERS = ("groq", "openai")
+DIRECT_HTTP_PROVIDERS = ()
+
+
+@dataclass(frozen=True, slots=True)
+class ModelSpec:
+    """A parsed "provider" / "provider:model_name" spec with its resolved temperature."""
+    provider: str
+    model_name: Optional[str]  # None means the provider default from MODELS_CONFIG
+    temperature: float = 0
+
+
+def parse_model_spec(spec):
+    """Parse "provider" or "provider:model_name" into a ModelSpec."""
+    provider, _, model_name = spec.partition(":")
+    provider = sys.intern(provider)
+    temperature = PROVIDER_TABLE[provider][1] if provider in PROVIDER_TABLE else 0
+    return ModelSpec(provider, model_name or None, temperature)
+
+
+# STAGE_MODELS pre-parsed once at import: stage -> ModelSpec
+STAGE_SPECS = {stage: parse_model_spec(spec) for stage, spec in STAGE_MODELS.items()}
+
+# Hedged stage 1: if the stage 1 model hasn't returned a usable answer after
+# STAGE_1_HEDGE_DELAY seconds (or fails), also ask the next enabled provider
+# and keep whichever answers first. Off by default since it can pay for a
+# second report; the delay should exceed a normal stage 1 response time.
+HEDGE_STAGE_1 = False
+STAGE_1_HEDGE_DELAY = 90
+
+# Stage 4 auditing: when False, the stage 3 model scores its own answers in the
+# same request and stage 4 only summarizes those scores (one LLM round trip
+# instead of two). Set to True to have the stage 4 model audit every answer
+# independently (run_pipeline.py --independent-audit does the same).
+INDEPENDENT_AUDIT = False
+
+# ============================================
+# RESPONSE CACHE
+# Per-stage cache mode for model responses:
+#   "off"      - always call the model
+#   "exact"    - reuse the response for an identical prompt
+#   "semantic" - also reuse responses for near-identical prompts
+#                (requires sentence-transformers, falls back to "exact")
+# ============================================
+STAGE_CACHE_MODES = {
+    "stage_1_gather_details": "exact",
+    "stage_2_generate_questions": "exact",
+    "stage_3_answer_questions": "exact",
+    "stage_4_score_results": "exact",
+}
+
+# How long cached responses stay valid, in seconds (None = forever).
+# Stage 1 reflects live facts about the company; later stages only depend on
+# the earlier stages' output, so they can be kept longer.
+STAGE_CACHE_TTLS = {
+    "stage_1_gather_details": 7 * 24 * 3600,
+    "stage_2_generate_questions": 30 * 24 * 3600,
+    "stage_3_answer_questions": 30 * 24 * 3600,
+    "stage_4_score_results": 30 * 24 * 3600,
+}
+
+# Set PIPELINE_NO_CACHE=1 (or run run_pipeline.py --no-cache) to skip the
+# response cache for every stage and always ask the providers.
+RESPONSE_CACHE_DISABLED = os.getenv("PIPELINE_NO_CACHE", "0") == "1"
+
 # Output settings
 OUTPUT_DIR = "output"
 MARKDOWN_FORMAT = True
 
 # Logging
 LOG_LEVEL = "INFO"
+
+# ============================================
+# Freeze the model/stage configuration so derived tables and
+# cached model instances can't silently go stale at runtime.
+# Edit the dictionaries above instead.
+# ============================================
+MODELS_CONFIG = MappingProxyType({
+    provider: MappingProxyType(cfg) for provider, cfg in MODELS_CONFIG.items()
+})
+STAGE_MODELS = MappingProxyType(STAGE_MODELS)
@@ -1,37 +1,90 @@
 import os
+import re
 import json
 import time
+import asyncio
+import functools
+from collections import Counter
 from datetime import datetime
-from config.models import get_models, get_model_by_spec
-from config.settings import STAGE_MODELS
+from config.cache import CachingChatModel
+from config.direct_client import close_async_client
+from config.models import get_models, get_model_by_spec, get_stage_model
+from config.settings import (
+    HEDGE_STAGE_1,
+    INDEPENDENT_AUDIT,
+    OUTPUT_DIR,
+    RESPONSE_CACHE_DISABLED,
+    STAGE_1_HEDGE_DELAY,
+    STAGE_CACHE_MODES,
+    STAGE_CACHE_TTLS,
+    STAGE_MODELS,
+    STAGE_SPECS,
+    parse_model_spec,
+    provider_max_concurrency,
+)
 from langchain_core.messages import HumanMessage
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Shorter stage 1 responses are treated as failed (e.g. refusals or truncated output)
+MIN_COMPANY_DETAILS_LENGTH = 200
+
+_JSON_DECODER = json.JSONDecoder()
+_JSON_START_RE = re.compile(r'[{\[]')
+_COMMENT_LINE_RE = re.compile(r'^[ \t]*#.*$', re.MULTILINE)
+
+
+def json_loads(text):
+    """Parse JSON text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def json_dumps(obj):
+    """Serialize obj as 2-space indented JSON text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+def _block_text(block):
+    """Text of a content block dict ('text' or 'content' key), or None if it has neither."""
+    text = block.get('text')
+    return text if text is not None else block.get('content')
+
+
+@functools.singledispatch
 def extract_text_content(content):
     """Extract pure text content from different response formats."""
-    if isinstance(content, str):
-        return content
-    
-    if isinstance(content, list):
-        text_parts = []
-        for item in content:
-            if isinstance(item, dict):
-                if 'text' in item:
-                    text_parts.append(item['text'])
-                elif 'content' in item:
-                    text_parts.append(item['content'])
-            elif isinstance(item, str):
-                text_parts.append(item)
-        return '\n'.join(text_parts) if text_parts else str(content)
-    
-    if isinstance(content, dict):
-        if 'text' in content:
-            return content['text']
-        elif 'content' in content:
-            return content['content']
-    
     return str(content)
 
 
+@extract_text_content.register
+def _(content: str):
+    return content
+
+
+@extract_text_content.register
+def _(content: list):
+    text_parts = [
+        item if isinstance(item, str) else _block_text(item)
+        for item in content
+        if isinstance(item, (str, dict))
+    ]
+    text_parts = [part for part in text_parts if part is not None]
+    return '\n'.join(text_parts) if text_parts else str(content)
+
+
+@extract_text_content.register
+def _(content: dict):
+    text = _block_text(content)
+    return text if text is not None else str(content)
+
+
 def clean_json_string(json_str):
     """
     Remove markdown code block markers from JSON strings.
@@ -40,22 +93,51 @@ def clean_json_string(json_str):
     if not isinstance(json_str, str):
         return json_str
     
-    # Remove markdown code block markers
-    json_str = json_str.strip()
-    
-    # Remove opening backticks and language identifier
-    if json_str.startswith('```json'):
-        json_str = json_str[7:]  # Remove '```json'
-    elif json_str.startswith('```'):
-        json_str = json_str[3:]  # Remove '```'
+    # Most responses have no fences at all; skip copying the (possibly large) string
+    if '```' not in json_str[:16] and '```' not in json_str[-16:]:
+        return json_str
     
-    # Remove closing backticks
-    if json_str.endswith('```'):
-        json_str = json_str[:-3]
+    # Remove opening backticks and language identifier, then closing backticks
+    json_str = json_str.strip()
+    json_str = json_str.removeprefix('```json').removeprefix('```').removesuffix('```')
     
     return json_str.strip()
 
 
+def _embedded_json(text):
+    """
+    Return the JSON object (or, failing that, array) embedded in text, or None.
+    raw_decode parses one value from a start offset and ignores whatever follows,
+    so each '{' / '[' outside an already decoded value is tried once with the C
+    scanner. Objects win over arrays, and the longest decoded value wins among them,
+    so a short bracketed aside in the prose doesn't shadow the real payload.
+    
+    >>> _embedded_json('Here is the data [1] and then {"responses": [{"a": 1}]}')
+    {'responses': [{'a': 1}]}
+    >>> _embedded_json('prefix {"x": [1,2,3] bad } then {"ok": true}')
+    {'ok': True}
+    >>> _embedded_json('scores: [1, 2] or [3, 4, 5]')
+    [3, 4, 5]
+    >>> _embedded_json('no json here') is None
+    True
+    """
+    best = None  # (is_object, length, value)
+    end = 0
+    for match in _JSON_START_RE.finditer(text):
+        start = match.start()
+        if start < end:
+            continue
+        try:
+            value, stop = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            continue
+        end = stop
+        candidate = (isinstance(value, dict), stop - start)
+        if best is None or candidate > best[:2]:
+            best = (*candidate, value)
+    return best[2] if best is not None else None
+
+
 def try_parse_json(json_str, stage_name=""):
     """
     Try multiple strategies to parse JSON string.
@@ -71,7 +153,7 @@ def try_parse_json(json_str, stage_name=""):
     
     # Strategy 1: Direct parse (may succeed if already clean)
     try:
-        return json.loads(json_str)
+        return json_loads(json_str)
     except json.JSONDecodeError:
         pass
     
@@ -79,61 +161,43 @@ def try_parse_json(json_str, stage_name=""):
     cleaned = clean_json_string(json_str)
     if cleaned != json_str:
         try:
-            return json.loads(cleaned)
+            return json_loads(cleaned)
         except json.JSONDecodeError:
             pass
     
-    # Strategy 3: Find and extract JSON block (handles extra text around JSON)
+    # Strategy 3: Drop '#' comment lines and retry
     try:
-        first_brace = cleaned.find('{')
-        last_brace = cleaned.rfind('}')
-        
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            extracted = cleaned[first_brace:last_brace + 1]
-            return json.loads(extracted)
+        return json_loads(_COMMENT_LINE_RE.sub('', cleaned))
     except (json.JSONDecodeError, ValueError):
         pass
     
-    # Strategy 4: Find first '[' and try to extract array
-    try:
-        first_bracket = cleaned.find('[')
-        last_bracket = cleaned.rfind(']')
-        
-        if first_bracket != -1 and last_bracket != -1 and last_bracket > first_bracket:
-            extracted = cleaned[first_bracket:last_bracket + 1]
-            return json.loads(extracted)
-    except (json.JSONDecodeError, ValueError):
-        pass
-    
-    # Strategy 5: Try to parse line by line and reconstruct
-    try:
-        lines = cleaned.split('\n')
-        json_lines = [line for line in lines if line.strip() and not line.strip().startswith('#')]
-        json_str_reconstructed = '\n'.join(json_lines)
-        return json.loads(json_str_reconstructed)
-    except (json.JSONDecodeError, ValueError):
-        pass
-    
-    # Strategy 6: Last resort - ensure we return a valid JSON object/array
-    # Try to extract any valid JSON structures and wrap in an object
-    try:
-        # Try to find balanced braces or brackets
-        for start_idx in range(len(cleaned)):
-            for end_idx in range(start_idx + 1, len(cleaned) + 1):
-                try:
-                    result = json.loads(cleaned[start_idx:end_idx])
-                    if isinstance(result, (dict, list)):
-                        return result
-                except (json.JSONDecodeError, ValueError):
-                    continue
-    except Exception:
-        pass
+    # Strategy 4: JSON object/array embedded in the text (handles extra text around JSON)
+    result = _embedded_json(cleaned)
+    if result is not None:
+        return result
     
     # All strategies failed, return original string
     return original_str
 
 
-def invoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, initial_wait=2):
+def format_error(error, limit=100):
+    """
+    Short one-line description of an exception for retry logs.
+    Reads the message from args instead of str(error), which for some provider
+    errors serializes the whole response body before it could be truncated.
+    """
+    message = error.args[0] if error.args and isinstance(error.args[0], str) else ""
+    return f"{type(error).__name__}: {message[:limit]}" if message else type(error).__name__
+
+
+def _cache_kwargs(model, semantic_key):
+    """invoke() keyword arguments only the response cache understands; empty for other models."""
+    if semantic_key is not None and isinstance(model, CachingChatModel):
+        return {"semantic_key": semantic_key}
+    return {}
+
+
+def invoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, initial_wait=2, semantic_key=None):
     """
     Invoke a model with retry logic and timeout handling.
     
@@ -143,6 +207,7 @@ def invoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, in
         model_name: Name of the model for logging
         max_retries: Maximum number of retry attempts
         initial_wait: Initial wait time in seconds before retry
+        semantic_key: Short text identifying the prompt's inputs, for semantic response caching
     
     Returns:
         Model response or None if all retries failed
@@ -150,16 +215,15 @@ def invoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, in
     for attempt in range(max_retries):
         try:
             print(f"  [{model_name}] Attempt {attempt + 1}/{max_retries}...")
-            response = model.invoke([HumanMessage(content=prompt)])
+            response = model.invoke([HumanMessage(content=prompt)], **_cache_kwargs(model, semantic_key))
             print(f"  {model_name} responded successfully")
             return response
         except Exception as e:
-            error_msg = str(e)
-            print(f"  !! {model_name} error (Attempt {attempt + 1}): {error_msg[:100]}")
+            print(f"  !! {model_name} error (Attempt {attempt + 1}): {format_error(e)}")
             
             if attempt < max_retries - 1:
                 wait_time = initial_wait * (2 ** attempt)  # Exponential backoff
-                print(f"  Retrying in {wait_time} seconds...")
+                print(f"  Retrying in {wait_time} seconds...", flush=True)
                 time.sleep(wait_time)
             else:
                 print(f"  {model_name} failed after {max_retries} attempts")
@@ -168,52 +232,164 @@ def invoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, in
     return None
 
 
-class CompanyAuditPipeline:
-    def __init__(self, company_name="Open AI"):
-        """Initialize the pipeline with a company name."""
-        self.company_name = company_name
-        self.models = get_models()
-        self.stage_results = {}
-        
-        # Get configured model specifications for each stage
-        self.stage_1_spec = STAGE_MODELS.get("stage_1_gather_details", "gemini")
-        self.stage_2_spec = STAGE_MODELS.get("stage_2_generate_questions", "groq")
-        self.stage_3_spec = STAGE_MODELS.get("stage_3_answer_questions", "groq")
-        self.stage_4_spec = STAGE_MODELS.get("stage_4_score_results", "cohere")
-        
-        # Get actual model instances for each stage
-        self.stage_1_model = get_model_by_spec(self.stage_1_spec)
-        self.stage_2_model = get_model_by_spec(self.stage_2_spec)
-        self.stage_3_model = get_model_by_spec(self.stage_3_spec)
-        self.stage_4_model = get_model_by_spec(self.stage_4_spec)
-        
-        # Validate all models are available
-        if not all([self.stage_1_model, self.stage_2_model, self.stage_3_model, self.stage_4_model]):
-            print("\n!! Error: Not all configured models could be initialized")
-            print("  Check your STAGE_MODELS configuration and API keys")
-            raise Exception("Model initialization failed")
-        
-        print(f"^ Pipeline initialized with {len(self.models)} available providers")
-        print(f"  Available: {', '.join(self.models.keys())}")
-        print(f"\n^ Configured Stage Models:")
-        print(f"  Stage 1 (Gather Details):      {self.stage_1_spec}")
-        print(f"  Stage 2 (Generate Questions):  {self.stage_2_spec}")
-        print(f"  Stage 3 (Answer Questions):    {self.stage_3_spec}")
-        print(f"  Stage 4 (Score Results):       {self.stage_4_spec}")
+async def ainvoke_model_with_retry(model, prompt, model_name="Model", max_retries=3, initial_wait=2, semantic_key=None):
+    """
+    Async version of invoke_model_with_retry, so many requests can be in flight at once.
     
-    def stage_1_company_details(self):
-        """
-        Stage 1: Gather company details using configured model
-        """
-        print("\n" + "-"*80)
-        print(f"STAGE 1: {self.stage_1_spec} - Getting Company Details")
-        print("-"*80)
-        
-        if self.stage_1_model is None:
-            print(f"Configured model '{self.stage_1_spec}' is not available")
-            return None
-        
-        prompt = f"""Role: You are a prospective evaluator of firms for a digital transformation project. You’ve shortlisted {self.company_name} and need unbiased, detailed, and actionable information to decide.
+    Args:
+        model: The LangChain model to invoke
+        prompt: The prompt to send to the model
+        model_name: Name of the model for logging
+        max_retries: Maximum number of retry attempts
+        initial_wait: Initial wait time in seconds before retry
+        semantic_key: Short text identifying the prompt's inputs, for semantic response caching
+    
+    Returns:
+        Model response or None if all retries failed
+    """
+    for attempt in range(max_retries):
+        try:
+            print(f"  [{model_name}] Attempt {attempt + 1}/{max_retries}...")
+            response = await model.ainvoke([HumanMessage(content=prompt)], **_cache_kwargs(model, semantic_key))
+            print(f"  {model_name} responded successfully")
+            return response
+        except Exception as e:
+            print(f"  !! {model_name} error (Attempt {attempt + 1}): {format_error(e)}")
+            
+            if attempt < max_retries - 1:
+                wait_time = initial_wait * (2 ** attempt)  # Exponential backoff
+                print(f"  Retrying in {wait_time} seconds...", flush=True)
+                await asyncio.sleep(wait_time)
+            else:
+                print(f"  {model_name} failed after {max_retries} attempts")
+                return None
+    
+    return None
+
+
+def discard_response(model, prompt):
+    """Drop a response the stage rejected from the model's response cache, if it has one."""
+    if isinstance(model, CachingChatModel):
+        model.discard(prompt)
+
+
+async def hedged_invoke(candidates, prompt, hedge_delay, is_valid, timeout=None, **retry_kwargs):
+    """
+    Hedged request: send the prompt to the first candidate model and, if no valid
+    response has arrived after hedge_delay seconds (or that model fails), also send
+    it to the next one. The first valid response wins and the rest are cancelled.
+    
+    Args:
+        candidates: List of (label, model) in priority order
+        prompt: The prompt to send
+        hedge_delay: Seconds to wait before starting the next candidate
+        is_valid: Callable(response) -> bool sanity check on a response
+        timeout: Optional overall limit in seconds
+        retry_kwargs: Passed through to ainvoke_model_with_retry
+    
+    Returns:
+        (label, response) of the winning model, or (None, None)
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    remaining = list(candidates)
+    launched = {}
+    pending = set()
+    
+    def launch_next():
+        label, model = remaining.pop(0)
+        task = asyncio.ensure_future(ainvoke_model_with_retry(model, prompt, model_name=label, **retry_kwargs))
+        launched[task] = (label, model)
+        pending.add(task)
+    
+    launch_next()
+    try:
+        while pending:
+            wait = hedge_delay if remaining else None
+            if deadline is not None:
+                left = deadline - loop.time()
+                if left <= 0:
+                    break
+                wait = left if wait is None else min(wait, left)
+            
+            done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                label, model = launched[task]
+                response = None if task.exception() else task.result()
+                if response is not None:
+                    if is_valid(response):
+                        return label, response
+                    discard_response(model, prompt)
+            
+            # Either the hedge delay elapsed or a candidate failed: bring in the next one
+            if remaining:
+                launch_next()
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the losers finish cancelling (and release their cache slots) before returning
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def run_async(coroutine):
+    """
+    asyncio.run() for the pipeline's async stages. Direct HTTP clients are made per
+    event loop, so the loop's client is closed before asyncio.run() discards the loop.
+    """
+    async def run():
+        try:
+            return await coroutine
+        finally:
+            await close_async_client()
+    
+    return asyncio.run(run())
+
+
+async def run_limited(semaphore, coroutine):
+    """Await coroutine once semaphore has a free slot."""
+    async with semaphore:
+        return await coroutine
+
+
+async def gather_limited(coroutines, limit):
+    """Run coroutines concurrently with at most `limit` in flight; exceptions are returned, not raised."""
+    semaphore = asyncio.Semaphore(limit)
+    return await asyncio.gather(*(run_limited(semaphore, c) for c in coroutines), return_exceptions=True)
+
+
+def summarize_evaluations(evaluations, responses):
+    """
+    Build the stage 4 overall summary from per-response evaluations.
+    Scores are averaged; sentiment and risk use the most common value.
+    """
+    def average(field):
+        values = [e.get("scores", {}).get(field) for e in evaluations]
+        values = [v for v in values if isinstance(v, (int, float))]
+        return round(sum(values) / len(values), 1) if values else "N/A"
+    
+    def most_common(values):
+        values = [v for v in values if v]
+        return Counter(values).most_common(1)[0][0] if values else "N/A"
+    
+    overconfident = sum(1 for e in evaluations if e.get("overconfidence_flag") is True)
+    speculative = sum(1 for e in evaluations if e.get("speculation_flag") is True)
+    
+    return {
+        "average_logical_score": average("logical_consistency"),
+        "average_completeness_score": average("completeness"),
+        "average_clarity_score": average("clarity"),
+        "dominant_sentiment_trend": most_common(r.get("sentiment") for r in responses),
+        "overall_company_risk_signal": most_common(e.get("risk_exposure") for e in evaluations),
+        "model_behavior_observations": (
+            f"{overconfident} of {len(evaluations)} answers flagged for overconfidence, "
+            f"{speculative} for speculative language"
+        ),
+    }
+
+
+# Stage prompt templates, filled in with str.format (literal braces are doubled)
+_STAGE_1_PROMPT = """Role: You are a prospective evaluator of firms for a digital transformation project. You’ve shortlisted {company} and need unbiased, detailed, and actionable information to decide.
  
 Prioritize clarity, specificity, and decision-useful insights (e.g., differentiators, risks, industry fit). Use bullet points, tables, or concise paragraphs where helpful.
 
@@ -221,68 +397,30 @@ STRICT INSTRUCTION: do not include emojis or json in the response
 
 Provide detailed information under the following sections:
 
-What is {self.company_name}?
-Tell me about {self.company_name}
-What does {self.company_name} do?
-List the key services offered by {self.company_name}
-Who are the main competitors of {self.company_name}
-Compare {self.company_name} with its competitors
-How large is {self.company_name} as a company?
-What industries does {self.company_name} primarily serve
-What are {self.company_name}'s strengths and weaknesses?
-Summarize online sentiment about {self.company_name}
-What are the reported strengths and weaknesses of {self.company_name}'s service
-How is {self.company_name} positioned compared to other top competitors in 2026
-Why should I choose {self.company_name}?
-Why should I NOT choose {self.company_name}?
-Tell me about leadership team members of {self.company_name} and their roles
-How is Life/Environment at {self.company_name}?
-Are their any partner or sponsers of {self.company_name}?
-Who are the notable customers of {self.company_name}?
+What is {company}?
+Tell me about {company}
+What does {company} do?
+List the key services offered by {company}
+Who are the main competitors of {company}
+Compare {company} with its competitors
+How large is {company} as a company?
+What industries does {company} primarily serve
+What are {company}'s strengths and weaknesses?
+Summarize online sentiment about {company}
+What are the reported strengths and weaknesses of {company}'s service
+How is {company} positioned compared to other top competitors in 2026
+Why should I choose {company}?
+Why should I NOT choose {company}?
+Tell me about leadership team members of {company} and their roles
+How is Life/Environment at {company}?
+Are their any partner or sponsers of {company}?
+Who are the notable customers of {company}?
 Mention any awards or achievement if they have?
-Give Employee perception of {self.company_name}
+Give Employee perception of {company}
 
 Provide thorough, factual, and comprehensive information for each section."""
-        
-        try:
-            response = invoke_model_with_retry(
-                self.stage_1_model,
-                prompt,
-                model_name=self.stage_1_spec,
-                max_retries=3,
-                initial_wait=2
-            )
-            
-            if response is None:
-                print(f"{self.stage_1_spec} failed to respond after retries")
-                return None
-            
-            details = extract_text_content(response.content)
-            self.stage_results["company_details"] = details
-            
-            print(f"Received company details ({len(details)} characters)")
-            return details
-        except Exception as e:
-            print(f"Error in Stage 1: {e}")
-            return None
-    
-    def stage_2_generate_questions(self, company_details):
-        """
-        Stage 2: Generate questions using configured model
-        """
-        print("\n" + "-"*80)
-        print(f"STAGE 2: {self.stage_2_spec} - Generating All Possible Questions")
-        print("-"*80)
-        
-        if self.stage_2_model is None:
-            print(f"Configured model '{self.stage_2_spec}' is not available")
-            return None
-        
-        if not company_details:
-            print("No company details provided")
-            return None
-        
-        prompt = f"""You are simulating real human curiosity.
+
+_STAGE_2_PROMPT = """You are simulating real human curiosity.
 
 Based on the company profile below:
 
@@ -326,63 +464,8 @@ Return output strictly in structured JSON format like:
 }}
 ```
 """
-        
-        try:
-            response = invoke_model_with_retry(
-                self.stage_2_model,
-                prompt,
-                model_name=self.stage_2_spec,
-                max_retries=3,
-                initial_wait=2
-            )
-            
-            if response is None:
-                print(f"{self.stage_2_spec} failed to respond after retries")
-                return None
-            
-            questions_text = extract_text_content(response.content)
-            
-            # Parse JSON with multiple strategies
-            questions_json = try_parse_json(questions_text, f"Stage 2 - {self.stage_2_spec} Questions")
-            self.stage_results["questions"] = questions_json
-            
-            # Count total questions from stakeholder perspectives
-            if isinstance(questions_json, dict):
-                total = sum(len(v) for v in questions_json.values() if isinstance(v, list))
-                stakeholders = [k for k in questions_json.keys() if k.endswith('_questions')]
-                print(f"Generated {total} questions from {len(stakeholders)} stakeholder perspectives")
-                print(f"  Stakeholders: {', '.join([s.replace('_questions', '') for s in stakeholders])}")
-            else:
-                print(f"Generated questions ({len(str(questions_json))} characters)")
-            
-            return self.stage_results["questions"]
-        except Exception as e:
-            print(f"Error in Stage 2: {e}")
-            return None
-    
-    def stage_3_answer_questions(self, company_details, questions):
-        """
-        Stage 3: Answer questions using configured model
-        """
-        print("\n" + "-"*80)
-        print(f"STAGE 3: {self.stage_3_spec} - Answering All Questions")
-        print("-"*80)
-        
-        if self.stage_3_model is None:
-            print(f"Configured model '{self.stage_3_spec}' is not available")
-            return None
-        
-        if not questions or not company_details:
-            print("Missing company details or questions")
-            return None
-        
-        # Format questions for the prompt
-        if isinstance(questions, dict):
-            questions_text = json.dumps(questions, indent=2)
-        else:
-            questions_text = str(questions)
-        
-        prompt = f"""
+
+_STAGE_3_PROMPT = """
 You are a seasoned business analyst with extensive experience in evaluating companies. Your task is to respond to a structured interrogation about a company based on the provided information. 
 Your answers should be thorough, objective, and professional, yet written in a natural, human-like tone.
 
@@ -415,7 +498,7 @@ If data is missing, clearly state this without speculation.
 - **"risk_flag"**: None / Low / Medium / High  
 - **"sentiment"**: Positive / Neutral / Negative  
 - **"reasoning_summary"**: 1–2 sentence explanation of how you derived the answer.  
-
+{score_fields}
 **Output Format:**
 
 ```json
@@ -428,7 +511,7 @@ If data is missing, clearly state this without speculation.
       "confidence": "",
       "risk_flag": "",
       "sentiment": "",
-      "reasoning_summary": ""
+      "reasoning_summary": ""{score_schema}
     }}
   ]
 }}
@@ -450,67 +533,8 @@ Risk_flag: Medium
 Sentiment: Neutral
 Reasoning_summary: The company profile does not include market share data, making it impossible to evaluate this aspect.
 """
-        
-        try:
-            response = invoke_model_with_retry(
-                self.stage_3_model, 
-                prompt, 
-                model_name=self.stage_3_spec,
-                max_retries=3,
-                initial_wait=3
-            )
-            
-            if response is None:
-                print(f"{self.stage_3_spec} failed to respond after retries")
-                return None
-            
-            answers_text = extract_text_content(response.content)
-            
-            # Parse JSON with multiple strategies
-            answers_json = try_parse_json(answers_text, f"Stage 3 - {self.stage_3_spec} Answers")
-            self.stage_results["answers"] = answers_json
-            
-            if isinstance(answers_json, dict):
-                total = len(answers_json.get("responses", []))
-                print(f"Answered {total} questions with detailed metadata")
-            else:
-                print(f"Generated answers ({len(str(answers_json))} characters)")
-            
-            return self.stage_results["answers"]
-        except Exception as e:
-            print(f"Error in Stage 3: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
-    
-    def stage_4_score_results(self, questions, answers):
-        """
-        Stage 4: Score and evaluate results using configured model
-        """
-        print("\n" + "-"*80)
-        print(f"STAGE 4: {self.stage_4_spec} - Scoring Results & Evaluation")
-        print("-"*80)
-        
-        if self.stage_4_model is None:
-            print(f"Configured model '{self.stage_4_spec}' is not available")
-            return None
-        
-        if not answers:
-            print("No answers to score")
-            return None
-        
-        # Format answers for the prompt
-        if isinstance(answers, dict):
-            answers_text = json.dumps(answers, indent=2)
-        else:
-            answers_text = str(answers)
-        
-        if isinstance(questions, dict):
-            questions_text = json.dumps(questions, indent=2)
-        else:
-            questions_text = str(questions)
-        
-        prompt = f"""You are an independent AI auditor.
+
+_STAGE_4_PROMPT = """You are an independent AI auditor.
 
 You are given structured question-answer data about a company.
 
@@ -557,199 +581,700 @@ Return strictly structured JSON in this format:
       "speculation_flag": true/false,
       "notes": ""
     }}
-  ],
-  "overall_summary": {{
-    "average_logical_score": 0,
-    "average_completeness_score": 0,
-    "average_clarity_score": 0,
-    "dominant_sentiment_trend": "",
-    "overall_company_risk_signal": "",
-    "model_behavior_observations": ""
-  }}
+  ]
 }}
 ```
 """
+
+# Extra stage 3 fields when the answering model also scores its answers (INDEPENDENT_AUDIT off)
+_STAGE_3_SCORE_FIELDS = """- **"scores"**: Your own rating of the answer's logical_consistency, completeness and clarity (1–10 each)  
+- **"hallucination_risk"**: Low / Medium / High  
+- **"bias_level"**: None / Mild / Moderate / Strong  
+- **"risk_exposure"**: Low / Medium / High  
+- **"overconfidence_flag"**: true if the answer overstates certainty, else false  
+- **"speculation_flag"**: true if the answer uses speculative language, else false  
+- **"notes"**: Any internal contradictions or caveats, otherwise ""  
+"""
+
+_STAGE_3_SCORE_SCHEMA = """,
+      "scores": {
+        "logical_consistency": 0,
+        "completeness": 0,
+        "clarity": 0
+      },
+      "hallucination_risk": "",
+      "bias_level": "",
+      "risk_exposure": "",
+      "overconfidence_flag": false,
+      "speculation_flag": false,
+      "notes": \"\""""
+
+# Stage 3 answer fields copied into stage 4 evaluation results when answers are self-scored
+_SELF_SCORE_KEYS = (
+    "scores", "hallucination_risk", "bias_level", "risk_exposure",
+    "overconfidence_flag", "speculation_flag", "notes",
+)
+
+
+class CompanyAuditPipeline:
+    def __init__(self, company_name="Open AI", independent_audit=None, use_cache=None):
+        """
+        Initialize the pipeline with a company name.
+        
+        Args:
+            independent_audit: Score answers with the separate stage 4 model instead of
+                               having stage 3 self-score them (defaults to INDEPENDENT_AUDIT)
+            use_cache: Use the per-stage response cache (defaults to STAGE_CACHE_MODES,
+                       unless RESPONSE_CACHE_DISABLED)
+        """
+        self.company_name = company_name
+        self.independent_audit = INDEPENDENT_AUDIT if independent_audit is None else independent_audit
+        self.use_cache = not RESPONSE_CACHE_DISABLED if use_cache is None else use_cache
+        # stage -> [(event loop the model was used on, or None, model), ...], newest last
+        self._stage_models = {}
+        self._stage_1_prompt = _STAGE_1_PROMPT.format(company=company_name)
+        self.models = get_models()
+        self.stage_results = {}
         
+        # Get configured model specifications for each stage
+        self.stage_1_spec = STAGE_MODELS.get("stage_1_gather_details", "gemini")
+        self.stage_2_spec = STAGE_MODELS.get("stage_2_generate_questions", "groq")
+        self.stage_3_spec = STAGE_MODELS.get("stage_3_answer_questions", "groq")
+        self.stage_4_spec = STAGE_MODELS.get("stage_4_score_results", "cohere")
+        
+        # Stage models are built on first use (see the stage_N_model properties);
+        # each stage reports its own model as unavailable if it cannot be built.
+        print(f"^ Pipeline initialized with {len(self.models)} enabled providers")
+        print(f"  Enabled: {', '.join(self.models.keys())}")
+        print(f"\n^ Configured Stage Models:")
+        print(f"  Stage 1 (Gather Details):      {self.stage_1_spec}")
+        print(f"  Stage 2 (Generate Questions):  {self.stage_2_spec}")
+        print(f"  Stage 3 (Answer Questions):    {self.stage_3_spec}")
+        if self.independent_audit:
+            print(f"  Stage 4 (Score Results):       {self.stage_4_spec}")
+        else:
+            print(f"  Stage 4 (Score Results):       self-scored by stage 3")
+    
+    @property
+    def stage_1_model(self):
+        return self._stage_model("stage_1_gather_details", self.stage_1_spec)
+    
+    @property
+    def stage_2_model(self):
+        return self._stage_model("stage_2_generate_questions", self.stage_2_spec)
+    
+    @property
+    def stage_3_model(self):
+        return self._stage_model("stage_3_answer_questions", self.stage_3_spec)
+    
+    @property
+    def stage_4_model(self):
+        return self._stage_model("stage_4_score_results", self.stage_4_spec)
+    
+    def _stage_model(self, stage, spec):
+        """
+        This pipeline's model for a stage, built on first use.
+        Async provider clients hold connections tied to the event loop they ran on,
+        and every asyncio.run() starts a new loop, so a model that has been used on
+        one loop is rebuilt for the next. Sync calls reuse whichever model is current.
+        """
         try:
-            response = invoke_model_with_retry(
-                self.stage_4_model,
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        built = self._stage_models.setdefault(stage, [])
+        if built:
+            bound, model = built[-1]
+            if loop is None or bound is loop:
+                return model
+            if bound is None:
+                built[-1] = (loop, model)
+                return model
+        
+        model = self._init_stage_model(stage, spec)
+        built.append((loop, model))
+        return model
+    
+    def _init_stage_model(self, stage, spec):
+        """
+        Build a new model for a stage, falling back to the default spec if it is not configured.
+        Models are not shared with other pipelines, so each has its own clients and cache stats.
+        """
+        if not self.use_cache:
+            return get_model_by_spec(STAGE_MODELS.get(stage, spec))
+        if stage in STAGE_SPECS:
+            return get_stage_model(stage)
+        return get_model_by_spec(
+            spec, STAGE_CACHE_MODES.get(stage, "off"), namespace=stage, cache_ttl=STAGE_CACHE_TTLS.get(stage)
+        )
+    
+    def _semantic_key(self, *inputs):
+        """
+        Short text naming a stage prompt's inputs, embedded for semantic cache lookups
+        instead of the whole prompt. Later stages' own inputs (company details, earlier
+        answers) follow from the company, so only the parts that vary within a run are added.
+        """
+        return "\n".join((self.company_name, *inputs))
+    
+    def _stage_1_fallback(self):
+        """First enabled provider other than stage 1's own, as (label, model), or None."""
+        primary = parse_model_spec(self.stage_1_spec).provider
+        for provider in self.models:
+            if provider == primary:
+                continue
+            # A new instance, so its async client belongs to the running event loop
+            model = get_model_by_spec(provider)
+            if model is not None:
+                return provider, model
+        return None
+    
+    def stage_1_company_details(self):
+        """
+        Stage 1: Gather company details using configured model
+        """
+        return run_async(self.astage_1_company_details())
+    
+    async def astage_1_company_details(self):
+        """
+        Stage 1: Gather company details using configured model.
+        With HEDGE_STAGE_1 enabled, a second provider is also asked if the
+        configured model is slow, fails or answers too briefly, and the first
+        answer of at least MIN_COMPANY_DETAILS_LENGTH characters wins.
+        """
+        print("\n" + "-"*80)
+        print(f"STAGE 1: {self.stage_1_spec} - Getting Company Details")
+        print("-"*80, flush=True)
+        
+        if self.stage_1_model is None:
+            print(f"Configured model '{self.stage_1_spec}' is not available")
+            return None
+        
+        prompt = self._stage_1_prompt
+        
+        candidates = [(self.stage_1_spec, self.stage_1_model)]
+        if HEDGE_STAGE_1:
+            fallback = self._stage_1_fallback()
+            if fallback:
+                candidates.append(fallback)
+        
+        # The length check only decides between hedge candidates; a lone model's answer is taken as is
+        hedged = len(candidates) > 1
+        
+        try:
+            source, response = await hedged_invoke(
+                candidates,
+                prompt,
+                hedge_delay=STAGE_1_HEDGE_DELAY,
+                is_valid=(
+                    (lambda r: len(extract_text_content(r.content).strip()) >= MIN_COMPANY_DETAILS_LENGTH)
+                    if hedged else (lambda r: True)
+                ),
+                max_retries=3,
+                initial_wait=2,
+                semantic_key=self._semantic_key(),
+            )
+            
+            if response is None:
+                if hedged:
+                    labels = " and ".join(label for label, _ in candidates)
+                    print(f"{labels} failed to respond or answered with under {MIN_COMPANY_DETAILS_LENGTH} characters")
+                else:
+                    print(f"{self.stage_1_spec} failed to respond after retries")
+                return None
+            
+            details = extract_text_content(response.content)
+            self.stage_results["company_details"] = details
+            if source != self.stage_1_spec and isinstance(self.stage_1_model, CachingChatModel):
+                # The backup won: keep its answer in the stage 1 cache so a rerun doesn't hedge again
+                self.stage_1_model.remember(prompt, response.content, semantic_key=self._semantic_key())
+            
+            print(f"Received company details from {source} ({len(details)} characters)")
+            return details
+        except Exception as e:
+            print(f"Error in Stage 1: {e}")
+            return None
+    
+    def stage_2_generate_questions(self, company_details):
+        """
+        Stage 2: Generate questions using configured model
+        """
+        return run_async(self.astage_2_generate_questions(company_details))
+    
+    async def astage_2_generate_questions(self, company_details):
+        """
+        Stage 2: Generate questions using configured model.
+        Awaited, so its network call and retry waits don't block the event loop.
+        """
+        print("\n" + "-"*80)
+        print(f"STAGE 2: {self.stage_2_spec} - Generating All Possible Questions")
+        print("-"*80, flush=True)
+        
+        if self.stage_2_model is None:
+            print(f"Configured model '{self.stage_2_spec}' is not available")
+            return None
+        
+        if not company_details:
+            print("No company details provided")
+            return None
+        
+        prompt = _STAGE_2_PROMPT.format(company_details=company_details)
+        
+        try:
+            response = await ainvoke_model_with_retry(
+                self.stage_2_model,
                 prompt,
-                model_name=self.stage_4_spec,
+                model_name=self.stage_2_spec,
                 max_retries=3,
-                initial_wait=2
+                initial_wait=2,
+                semantic_key=self._semantic_key(),
             )
             
             if response is None:
-                print(f"{self.stage_4_spec} failed to respond after retries")
+                print(f"{self.stage_2_spec} failed to respond after retries")
                 return None
             
-            scores_text = extract_text_content(response.content)
+            questions_text = extract_text_content(response.content)
             
             # Parse JSON with multiple strategies
-            scores_json = try_parse_json(scores_text, f"Stage 4 - {self.stage_4_spec} Scores")
-            self.stage_results["scores"] = scores_json
+            questions_json = try_parse_json(questions_text, f"Stage 2 - {self.stage_2_spec} Questions")
+            self.stage_results["questions"] = questions_json
+            if not isinstance(questions_json, dict):
+                # Still usable as text this time, but not worth replaying on later runs
+                discard_response(self.stage_2_model, prompt)
             
-            if isinstance(scores_json, dict):
-                if "overall_summary" in scores_json:
-                    summary = scores_json["overall_summary"]
-                    avg_logic = summary.get("average_logical_score", "N/A")
-                    risk_signal = summary.get("overall_company_risk_signal", "N/A")
-                    print(f"  Evaluation complete")
-                    print(f"  Average Logical Consistency Score: {avg_logic}/10")
-                    print(f"  Overall Risk Signal: {risk_signal}")
+            # Count total questions from stakeholder perspectives
+            if isinstance(questions_json, dict):
+                total = sum(len(v) for v in questions_json.values() if isinstance(v, list))
+                stakeholders = [k for k in questions_json.keys() if k.endswith('_questions')]
+                print(f"Generated {total} questions from {len(stakeholders)} stakeholder perspectives")
+                print(f"  Stakeholders: {', '.join([s.replace('_questions', '') for s in stakeholders])}")
+            else:
+                print(f"Generated questions ({len(questions_text)} characters)")
+            
+            return self.stage_results["questions"]
+        except Exception as e:
+            print(f"Error in Stage 2: {e}")
+            return None
+    
+    def _concurrency(self, spec):
+        """Max in-flight requests for a stage, from its provider's limit."""
+        return provider_max_concurrency(parse_model_spec(spec).provider)
+    
+    def _stage_3_prompt(self, company_details, questions_text):
+        """Build the stage 3 prompt for a set of stakeholder questions."""
+        if self.independent_audit:
+            score_fields, score_schema = "", ""
+        else:
+            score_fields, score_schema = _STAGE_3_SCORE_FIELDS, _STAGE_3_SCORE_SCHEMA
+        return _STAGE_3_PROMPT.format(
+            company_details=company_details,
+            questions_text=questions_text,
+            score_fields=score_fields,
+            score_schema=score_schema,
+        )
+    
+    def _stage_3_batches(self, questions):
+        """
+        Serialized questions for each stage 3 request: one per stakeholder, or a
+        single request for unstructured questions.
+        """
+        if isinstance(questions, dict):
+            return [
+                json_dumps({stakeholder: stakeholder_questions})
+                for stakeholder, stakeholder_questions in questions.items()
+                if isinstance(stakeholder_questions, list) and stakeholder_questions
+            ]
+        return [str(questions)]
+    
+    def stage_3_answer_questions(self, company_details, questions):
+        """
+        Stage 3: Answer questions using configured model
+        """
+        return run_async(self.astage_3_answer_questions(company_details, questions))
+    
+    async def astage_3_answer_questions(self, company_details, questions, on_responses=None):
+        """
+        Stage 3: Answer questions using configured model.
+        Each stakeholder's questions are sent as one request and requests run concurrently.
+        
+        Args:
+            on_responses: Optional callback, called with each request's parsed
+                          responses as soon as that request completes
+        """
+        print("\n" + "-"*80)
+        print(f"STAGE 3: {self.stage_3_spec} - Answering All Questions")
+        print("-"*80, flush=True)
+        
+        if self.stage_3_model is None:
+            print(f"Configured model '{self.stage_3_spec}' is not available")
+            return None
+        
+        if not questions or not company_details:
+            print("Missing company details or questions")
+            return None
+        
+        batches = self._stage_3_batches(questions)
+        
+        async def answer(number, questions_text):
+            prompt = self._stage_3_prompt(company_details, questions_text)
+            result = await ainvoke_model_with_retry(
+                self.stage_3_model,
+                prompt,
+                model_name=f"{self.stage_3_spec} #{number}",
+                max_retries=3,
+                initial_wait=3,
+                semantic_key=self._semantic_key("answers" if self.independent_audit else "scored answers", questions_text),
+            )
+            if result is None:
+                return None
+            
+            # Parse JSON with multiple strategies
+            answers_text = extract_text_content(result.content)
+            parsed = try_parse_json(answers_text, f"Stage 3 - {self.stage_3_spec} Answers")
+            if not (isinstance(parsed, dict) and isinstance(parsed.get("responses"), list)):
+                discard_response(self.stage_3_model, prompt)
+                return None
+            
+            if on_responses is not None:
+                on_responses(parsed["responses"])
+            return parsed["responses"]
+        
+        try:
+            results = await gather_limited(
+                (answer(number, questions_text) for number, questions_text in enumerate(batches, 1)),
+                self._concurrency(self.stage_3_spec),
+            )
+            
+            responses = []
+            failed = 0
+            for result in results:
+                if result is None or isinstance(result, Exception):
+                    failed += 1
                 else:
-                    print(f" Evaluation complete")
+                    responses.extend(result)
+            
+            if failed:
+                print(f"  !! {failed} of {len(batches)} requests failed or returned unparseable answers")
+            
+            if not responses:
+                print(f"{self.stage_3_spec} failed to answer any questions")
+                return None
+            
+            self.stage_results["answers"] = {"responses": responses}
+            print(f"Answered {len(responses)} questions with detailed metadata")
+            
+            return self.stage_results["answers"]
+        except Exception as e:
+            print(f"Error in Stage 3: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def _stage_4_prompt(self, answers_text):
+        """Build the stage 4 prompt for a set of question-answer responses."""
+        return _STAGE_4_PROMPT.format(answers_text=answers_text)
+    
+    def stage_4_score_results(self, questions, answers):
+        """
+        Stage 4: Score and evaluate results using configured model.
+        questions is unused (answers carry their questions); it is kept for compatibility.
+        """
+        return run_async(self.astage_4_score_results(answers))
+    
+    async def _stage_4_request(self, answers_text, number):
+        """Score one batch of answers with the stage 4 model; returns its evaluations, or None."""
+        prompt = self._stage_4_prompt(answers_text)
+        result = await ainvoke_model_with_retry(
+            self.stage_4_model,
+            prompt,
+            model_name=f"{self.stage_4_spec} #{number}",
+            max_retries=3,
+            initial_wait=2,
+            semantic_key=self._semantic_key(answers_text),
+        )
+        if result is None:
+            return None
+        
+        # Parse JSON with multiple strategies
+        scores_text = extract_text_content(result.content)
+        parsed = try_parse_json(scores_text, f"Stage 4 - {self.stage_4_spec} Scores")
+        if not (isinstance(parsed, dict) and isinstance(parsed.get("evaluation_results"), list)):
+            discard_response(self.stage_4_model, prompt)
+            return None
+        return parsed["evaluation_results"]
+    
+    async def astage_4_score_results(self, answers, scoring=None):
+        """
+        Stage 4: Score and evaluate results using configured model.
+        Each stakeholder's answers are scored in one request, concurrently; the
+        overall summary is computed from the individual evaluations.
+        Without independent_audit, the scores stage 3 attached to each answer
+        are used instead and no stage 4 requests are made.
+        
+        Args:
+            scoring: Optional scoring tasks already started while stage 3 was
+                     running, one per stage 3 request, covering every answer
+        """
+        print("\n" + "-"*80)
+        if not self.independent_audit:
+            print(f"STAGE 4: {self.stage_3_spec} (self-scored) - Scoring Results & Evaluation")
+            print("-"*80, flush=True)
+            return self._stage_4_self_scores(answers)
+        
+        print(f"STAGE 4: {self.stage_4_spec} - Scoring Results & Evaluation")
+        print("-"*80, flush=True)
+        
+        if self.stage_4_model is None:
+            print(f"Configured model '{self.stage_4_spec}' is not available")
+            return None
+        
+        if not answers:
+            print("No answers to score")
+            return None
+        
+        structured = isinstance(answers, dict) and isinstance(answers.get("responses"), list)
+        responses = answers["responses"] if structured else []
+        
+        try:
+            if scoring:
+                # Already serialized and sent while stage 3 ran
+                results = await asyncio.gather(*scoring, return_exceptions=True)
             else:
-                print(f" Evaluation complete ({len(str(scores_json))} characters)")
+                # One request per stakeholder; unstructured answers go in a single request
+                if structured:
+                    by_stakeholder = {}
+                    for response in responses:
+                        stakeholder = response.get("stakeholder", "") if isinstance(response, dict) else ""
+                        by_stakeholder.setdefault(stakeholder, []).append(response)
+                    batches = [json_dumps({"responses": group}) for group in by_stakeholder.values()]
+                else:
+                    batches = [json_dumps(answers) if isinstance(answers, dict) else str(answers)]
+                
+                results = await gather_limited(
+                    (self._stage_4_request(answers_text, number) for number, answers_text in enumerate(batches, 1)),
+                    self._concurrency(self.stage_4_spec),
+                )
+            
+            evaluations = []
+            failed = 0
+            for result in results:
+                if result is None or isinstance(result, Exception):
+                    failed += 1
+                else:
+                    evaluations.extend(result)
+            
+            if failed:
+                print(f"  !! {failed} of {len(results)} requests failed or returned unparseable scores")
             
-            return self.stage_results["scores"]
+            if not evaluations:
+                print(f"{self.stage_4_spec} failed to score any answers")
+                return None
+            
+            return self._store_stage_4(evaluations, responses)
         except Exception as e:
             print(f"Error in Stage 4: {e}")
             import traceback
             traceback.print_exc()
             return None
     
+    def _stage_4_self_scores(self, answers):
+        """Stage 4 without an independent audit: collect the scores stage 3 attached to each answer."""
+        if not answers:
+            print("No answers to score")
+            return None
+        
+        responses = answers.get("responses", []) if isinstance(answers, dict) else []
+        evaluations = [
+            {
+                "stakeholder": response.get("stakeholder", ""),
+                "question": response.get("question", ""),
+                **{key: response[key] for key in _SELF_SCORE_KEYS if key in response},
+            }
+            for response in responses
+            if isinstance(response, dict) and isinstance(response.get("scores"), dict)
+        ]
+        
+        missing = len(responses) - len(evaluations)
+        if missing:
+            print(f"  !! {missing} of {len(responses)} answers came back without self-scores")
+        
+        if not evaluations:
+            print(f"{self.stage_3_spec} did not score any of its answers")
+            return None
+        
+        return self._store_stage_4(evaluations, responses)
+    
+    def _store_stage_4(self, evaluations, responses):
+        """Summarize the evaluations, store them as the stage 4 result and report."""
+        summary = summarize_evaluations(evaluations, responses)
+        self.stage_results["scores"] = {"evaluation_results": evaluations, "overall_summary": summary}
+        
+        print(f"  Evaluation complete")
+        print(f"  Average Logical Consistency Score: {summary['average_logical_score']}/10")
+        print(f"  Overall Risk Signal: {summary['overall_company_risk_signal']}")
+        
+        return self.stage_results["scores"]
+    
     def run_full_pipeline(self):
         """Run the complete 4-stage pipeline."""
+        return run_async(self.run_full_pipeline_async())
+    
+    async def run_full_pipeline_async(self):
+        """
+        Run the complete 4-stage pipeline; stages 3 and 4 fan out concurrently.
+        With an independent audit, each stage 3 request's answers are sent for
+        scoring as soon as they arrive, so stage 4 runs alongside stage 3
+        instead of waiting for every answer.
+        """
         print("\n" + "="*100)
         print(f"STARTING COMPLETE PIPELINE FOR: {self.company_name}".center(100))
-        print("="*100)
+        print("="*100, flush=True)
         
         # Stage 1: Get company details
-        company_details = self.stage_1_company_details()
+        company_details = await self.astage_1_company_details()
         if not company_details:
             print("\nPipeline failed at Stage 1")
             return False
         
         # Stage 2: Generate questions
-        questions = self.stage_2_generate_questions(company_details)
+        questions = await self.astage_2_generate_questions(company_details)
         if not questions:
             print("\nPipeline failed at Stage 2")
             return False
         
-        # Stage 3: Answer questions
-        answers = self.stage_3_answer_questions(company_details, questions)
+        # Stage 3: Answer questions, starting stage 4 scoring for each request's answers as they come in
+        scoring = []
+        semaphore = asyncio.Semaphore(self._concurrency(self.stage_4_spec))
+        
+        def on_responses(responses):
+            request = self._stage_4_request(json_dumps({"responses": responses}), len(scoring) + 1)
+            scoring.append(asyncio.create_task(run_limited(semaphore, request)))
+        
+        answers = await self.astage_3_answer_questions(
+            company_details, questions, on_responses=on_responses if self.independent_audit and self.stage_4_model else None
+        )
         if not answers:
+            for task in scoring:
+                task.cancel()
             print("\nPipeline failed at Stage 3")
             return False
         
-        # Stage 4: Score results
-        scores = self.stage_4_score_results(questions, answers)
+        # Stage 4: Collect the scores (most are already done or in flight)
+        scores = await self.astage_4_score_results(answers, scoring=scoring)
         if not scores:
             print("\nPipeline failed at Stage 4")
             return False
         
         print("\n" + "="*100)
         print(" PIPELINE COMPLETED SUCCESSFULLY".center(100))
-        print("="*100)
+        print("="*100, flush=True)
         
         return True
     
-    def save_results(self, filename=None):
-        """Save pipeline results to a file."""
+    def save_results(self, filename=None, verbose=True):
+        """
+        Save pipeline results to a file.
+        With verbose=False only errors are printed (e.g. when saving in the background).
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"pipeline_results_{timestamp}.json"
+            slug = re.sub(r"[^a-z0-9]+", "_", self.company_name.lower()).strip("_") or "company"
+            filename = f"pipeline_results_{slug}_{timestamp}.json"
         
         try:
-            if not os.path.exists("output"):
-                os.makedirs("output")
-                print("^ Created output directory")
-            
-            filepath = os.path.join("output", filename)
-            
-            # Prepare results for serialization - ensure JSON fields are properly parsed
-            results_to_save = {}
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            filepath = os.path.join(OUTPUT_DIR, filename)
             
-            for key, value in self.stage_results.items():
-                if isinstance(value, str):
-                    # Try to parse JSON strings one more time
-                    parsed = try_parse_json(value, key)
-                    
-                    # If still a string, wrap it as a string value in a dict for valid JSON
-                    if isinstance(parsed, str):
-                        results_to_save[key] = {"raw_content": parsed, "_note": "Failed to parse JSON, stored as string"}
-                    else:
-                        results_to_save[key] = parsed
-                else:
-                    results_to_save[key] = value
-            
-            # Write to file
+            # Stages 2-4 already ran their output through try_parse_json and company
+            # details are prose, so stage results are saved exactly as stored.
+            # A failed write raises and is reported below.
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(results_to_save, f, indent=2, ensure_ascii=False)
+                f.write(json_dumps(self.stage_results))
+                file_size = f.tell()
             
-            # Verify file was created
-            if os.path.exists(filepath):
-                file_size = os.path.getsize(filepath)
+            if verbose:
                 print(f"\n^ Results saved successfully!")
                 print(f"  File: {filepath}")
                 print(f"  Size: {file_size} bytes")
-                return filepath
-            else:
-                print(f"!! File was not created at {filepath}")
-                return None
+            return filepath
         except Exception as e:
             print(f"\n!! Error saving results: {e}")
             import traceback
             traceback.print_exc()
             return None
     
-    def print_summary(self):
-        """Print a summary of pipeline results."""
-        print("\n" + "="*80)
-        print("PIPELINE RESULTS SUMMARY")
-        print("="*80)
+    def cache_stats(self):
+        """
+        Response cache hits/misses per stage for this pipeline's calls. Stages with
+        caching off, or whose model was never built, are left out.
+        """
+        stats = {}
+        for stage, built in sorted(self._stage_models.items()):
+            models = [model for _, model in built if isinstance(model, CachingChatModel)]
+            if models:
+                stats[stage] = {
+                    "hits": sum(model.hits for model in models),
+                    "misses": sum(model.misses for model in models),
+                }
+        return stats
+    
+    def print_summary(self, file=None):
+        """Print a summary of pipeline results to file (default: sys.stdout)."""
+        print("\n" + "="*80, file=file)
+        print("PIPELINE RESULTS SUMMARY", file=file)
+        print("="*80, file=file)
         
         if "company_details" in self.stage_results:
-            print(f"\n[Stage 1 - Company Details]")
-            print(f"  • Received {len(self.stage_results['company_details'])} characters of company information")
+            print(f"\n[Stage 1 - Company Details]", file=file)
+            print(f"  • Received {len(self.stage_results['company_details'])} characters of company information", file=file)
         
         if "questions" in self.stage_results:
-            print(f"\n[Stage 2 - Generated Questions]")
+            print(f"\n[Stage 2 - Generated Questions]", file=file)
             questions = self.stage_results["questions"]
             if isinstance(questions, dict):
                 stakeholders = questions.keys()
                 total_questions = sum(len(v) for v in questions.values() if isinstance(v, list))
-                print(f"  • Stakeholder perspectives: {', '.join(stakeholders)}")
-                print(f"  • Total questions generated: {total_questions}")
+                print(f"  • Stakeholder perspectives: {', '.join(stakeholders)}", file=file)
+                print(f"  • Total questions generated: {total_questions}", file=file)
+            elif isinstance(questions, list):
+                print(f"  • Total questions generated: {len(questions)}", file=file)
             else:
-                print(f"  • Generated {len(str(questions))} characters of questions")
+                print(f"  • Generated {len(str(questions))} characters of questions", file=file)
         
         if "answers" in self.stage_results:
-            print(f"\n[Stage 3 - Answers]")
-            answers = self.stage_results["answers"]
-            if isinstance(answers, dict):
-                responses = answers.get("responses", [])
-                total = len(responses)
-                
-                # Count by sentiment
-                sentiments = {}
-                confidences = {}
-                for resp in responses:
-                    sentiment = resp.get("sentiment", "Unknown")
-                    confidence = resp.get("confidence", "Unknown")
-                    sentiments[sentiment] = sentiments.get(sentiment, 0) + 1
-                    confidences[confidence] = confidences.get(confidence, 0) + 1
-                
-                print(f"  • Total answers provided: {total}")
-                print(f"  • Sentiment distribution: {sentiments}")
-                print(f"  • Confidence levels: {confidences}")
-            else:
-                print(f"  • Generated {len(str(answers))} characters of answers")
+            print(f"\n[Stage 3 - Answers]", file=file)
+            # Stage 3 always stores {"responses": [...]}
+            responses = self.stage_results["answers"]["responses"]
+            total = len(responses)
+            
+            # Count by sentiment and confidence
+            sentiments = Counter(resp.get("sentiment", "Unknown") for resp in responses if isinstance(resp, dict))
+            confidences = Counter(resp.get("confidence", "Unknown") for resp in responses if isinstance(resp, dict))
+            
+            print(f"  • Total answers provided: {total}", file=file)
+            print(f"  • Sentiment distribution: {dict(sentiments)}", file=file)
+            print(f"  • Confidence levels: {dict(confidences)}", file=file)
         
         if "scores" in self.stage_results:
-            print(f"\n[Stage 4 - Evaluation & Scores]")
+            print(f"\n[Stage 4 - Evaluation & Scores]", file=file)
             scores = self.stage_results["scores"]
             if isinstance(scores, dict):
                 if "overall_summary" in scores:
                     summary = scores["overall_summary"]
-                    print(f"  • Average Logical Consistency: {summary.get('average_logical_score', 'N/A')}/10")
-                    print(f"  • Average Completeness: {summary.get('average_completeness_score', 'N/A')}/10")
-                    print(f"  • Average Clarity: {summary.get('average_clarity_score', 'N/A')}/10")
-                    print(f"  • Overall Risk Signal: {summary.get('overall_company_risk_signal', 'N/A')}")
-                    print(f"  • Dominant Sentiment Trend: {summary.get('dominant_sentiment_trend', 'N/A')}")
-        
-        print("\n" + "="*80)
+                    print(f"  • Average Logical Consistency: {summary.get('average_logical_score', 'N/A')}/10", file=file)
+                    print(f"  • Average Completeness: {summary.get('average_completeness_score', 'N/A')}/10", file=file)
+                    print(f"  • Average Clarity: {summary.get('average_clarity_score', 'N/A')}/10", file=file)
+                    print(f"  • Overall Risk Signal: {summary.get('overall_company_risk_signal', 'N/A')}", file=file)
+                    print(f"  • Dominant Sentiment Trend: {summary.get('dominant_sentiment_trend', 'N/A')}", file=file)
+
+        cache_stats = self.cache_stats()
+        if cache_stats:
+            print(f"\n[Response Cache]", file=file)
+            for stage, stats in cache_stats.items():
+                print(f"  • {stage}: {stats['hits']} hits, {stats['misses']} misses", file=file)
+
+        print("\n" + "="*80, file=file)
 
 
 if __name__ == "__main__":
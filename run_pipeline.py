@@ -1,39 +1,180 @@
-from pipeline import CompanyAuditPipeline
+import argparse
+import io
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-if __name__ == "__main__":
-    print("\n" + "="*100)
-    print(" COMPANY AUDIT PIPELINE - 4 STAGE ORCHESTRATION ".center(100, "="))
-    print("="*100)
+from config.settings import LOG_LEVEL
+
+_BAR = "=" * 100
+_TITLE = " COMPANY AUDIT PIPELINE - 4 STAGE ORCHESTRATION ".center(100, "=")
+# Written straight to the file descriptor (when there is one) before anything else is printed
+_BANNER = f"\n{_BAR}\n{_TITLE}\n{_BAR}\n".encode()
+
+# Exit codes returned by main()
+EXIT_PIPELINE_FAILED = 1
+EXIT_SAVE_FAILED = 2
+EXIT_INTERRUPTED = 130
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the 4-stage company audit pipeline.")
+    parser.add_argument(
+        "companies", nargs="*",
+        help="Companies to audit in this run (default: $COMPANY_NAME, or 'Open AI')",
+    )
+    parser.add_argument(
+        "--independent-audit", action="store_true",
+        help="Score answers with the stage 4 model instead of stage 3 self-scores",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Always call the providers instead of replaying cached responses (same as PIPELINE_NO_CACHE=1)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="How many companies to audit at the same time (default: 1)",
+    )
+    return parser.parse_args(argv)
+
+
+def warm_stage_models(pipelines):
+    """Build each pipeline's stage models (clients, caches) ahead of the run."""
+    for pipeline in pipelines:
+        pipeline.stage_1_model
+        pipeline.stage_2_model
+        pipeline.stage_3_model
+        if pipeline.independent_audit:
+            pipeline.stage_4_model
+
+
+def run_company(pipeline):
+    """
+    Run all 4 stages for one pipeline, then print its summary and save the results.
+    Returns an exit code: 0 on success, EXIT_PIPELINE_FAILED or EXIT_SAVE_FAILED.
+    """
+    if not pipeline.run_full_pipeline():
+        print(f"\n!! Pipeline execution failed for {pipeline.company_name}. Check the errors above.")
+        return EXIT_PIPELINE_FAILED
+    
+    # Save to file in the background while the results summary is rendered into a
+    # buffer; the summary and final status are written out in one go
+    tail = io.StringIO()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        saving = executor.submit(pipeline.save_results, verbose=False)
+        pipeline.print_summary(file=tail)
+        results_file = saving.result()
+    
+    status = (
+        f"\n Complete! Check '{results_file}' for full results.\n" if results_file
+        else "\n!! Failed to save results. Check the errors above.\n"
+    )
+    sys.stdout.write(tail.getvalue() + status)
+    sys.stdout.flush()
+    
+    return 0 if results_file else EXIT_SAVE_FAILED
+
+
+def buffer_stdout():
+    """
+    Don't flush stdout on every line: output is flushed at checkpoints (stage headers,
+    retry waits, before the ENTER prompt, after each summary and on exit).
+    When it goes to a file or pipe, collect prints in a 1 MiB buffer.
+    Streams without a file descriptor (IDEs, notebooks, captured output) are left alone.
+    Returns a function that puts the original stream settings back.
+    """
+    stream = sys.stdout
+    try:
+        fd = stream.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return lambda: None
     
-    # CUSTOMIZE THIS - Change company name as needed
-    COMPANY_NAME = "Open AI"
+    stream.flush()
+    if not stream.isatty():
+        sys.stdout = io.TextIOWrapper(
+            io.BufferedWriter(io.FileIO(fd, "w", closefd=False), buffer_size=1 << 20),
+            encoding=stream.encoding,
+            errors=stream.errors,
+        )
+        
+        def restore():
+            sys.stdout.flush()
+            sys.stdout = stream
+        return restore
+    
+    if hasattr(stream, "reconfigure"):
+        line_buffering, write_through = stream.line_buffering, stream.write_through
+        stream.reconfigure(line_buffering=False, write_through=False)
+        return lambda: stream.reconfigure(line_buffering=line_buffering, write_through=write_through)
+    return lambda: None
+
+
+def write_banner():
+    """Write the banner straight to the file descriptor when there is one, before anything else is printed."""
+    try:
+        os.write(sys.stdout.fileno(), _BANNER)
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        sys.stdout.write(_BANNER.decode())
+
+
+def main(argv=None):
+    """Command line entry point. Returns the process exit code (the worst across companies)."""
+    args = parse_args(argv)
+    logging.basicConfig(level=LOG_LEVEL, format="!! %(message)s")
     
+    restore_stdout = buffer_stdout()
     try:
-        # Initialize pipeline
-        pipeline = CompanyAuditPipeline(company_name=COMPANY_NAME)
+        write_banner()
         
-        # Run all 4 stages
-        input("\nPress ENTER to start the pipeline... ")
-        success = pipeline.run_full_pipeline()
+        # Imported after the banner so it shows while the pipeline and provider modules load
+        from pipeline import CompanyAuditPipeline
+        from config.models import start_provider_import_warmup
         
-        if success:
-            # Show results summary
-            pipeline.print_summary()
-            
-            # Save to file
-            print("\nSaving results to file...")
-            results_file = pipeline.save_results()
-            
-            if results_file:
-                print(f"\n Complete! Check '{results_file}' for full results.")
-            else:
-                print(f"\n!! Failed to save results. Check the errors above.")
-        else:
-            print("\n!! Pipeline execution failed. Check the errors above.")
+        # Load the stage providers' SDKs while the pipelines are set up
+        start_provider_import_warmup()
+        
+        # Companies come from the command line, else $COMPANY_NAME
+        companies = args.companies or [os.getenv("COMPANY_NAME", "Open AI")]
+        
+        # Initialize one pipeline per company; they share the loaded modules, each builds its own model clients
+        pipelines = [
+            CompanyAuditPipeline(
+                company_name=company_name,
+                independent_audit=True if args.independent_audit else None,
+                use_cache=False if args.no_cache else None,
+            )
+            for company_name in companies
+        ]
+        
+        # Run all 4 stages (set PIPELINE_INTERACTIVE=1 to confirm before starting)
+        if sys.stdin.isatty() and os.getenv("PIPELINE_INTERACTIVE", "0") == "1":
+            # Use the wait for ENTER to build the stage models in the background
+            warmup = threading.Thread(target=warm_stage_models, args=(pipelines,), daemon=True)
+            warmup.start()
+            sys.stdout.flush()
+            input("\nPress ENTER to start the pipeline... ")
+            warmup.join()
+        
+        # Companies are independent, so with --workers > 1 their network waits overlap
+        if args.workers > 1 and len(pipelines) > 1:
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                return max(executor.map(run_company, pipelines))
+        return max(run_company(pipeline) for pipeline in pipelines)
     
     except KeyboardInterrupt:
         print("\n\n Pipeline interrupted by user.")
+        return EXIT_INTERRUPTED
     except Exception as e:
         print(f"\n!! Unexpected error: {e}")
-        import traceback
-        traceback.print_exc()
+        sys.stdout.flush()
+        # The interpreter's default hook prints the traceback without importing traceback here
+        sys.excepthook(type(e), e, e.__traceback__)
+        return EXIT_PIPELINE_FAILED
+    finally:
+        sys.stdout.flush()
+        restore_stdout()
+
+
+if __name__ == "__main__":
+    sys.exit(main())